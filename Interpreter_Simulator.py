@@ -1,97 +1,35 @@
-import re
+import functools
+import itertools
+import operator
+import timeit
+from array import array
+from collections import deque
 
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
 
-class Token:
-    """
-    Represents a lexical token in the input.
-
-    Attributes:
-        type (str): The type of the token (e.g., 'NUMBER', 'OPERATOR').
-        value (str or int): The value of the token (e.g., '5', '+').
-    """
-
-    def __init__(self, type, value):
-        """
-        Initializes a Token with a specified type and value.
-
-        Args:
-            type (str): The type of the token.
-            value (str or int): The value of the token.
-        """
-        self.type = type
-        self.value = value
-
-
-class Lexer:
-    """
-    Performs lexical analysis, converting an input string into tokens.
-
-    Attributes:
-        text (str): The input string to be tokenized.
-        pos (int): The current position in the input string.
-    """
-
-    def __init__(self, text):
-        """
-        Initializes the Lexer with the input text.
-
-        Args:
-            text (str): The input string to be tokenized.
-        """
-        self.text = text
-        self.pos = 0
+from lexer import TT, Lexer
 
-    def tokenize(self):
-        """
-        Tokenizes the input text into a list of tokens.
+OP_ADD, OP_SUB, OP_MUL, OP_DIV = range(4)
 
-        Returns:
-            list: A list of Token objects.
-        """
-        tokens = []
-        while self.pos < len(self.text):
-            if self.text[self.pos].isspace():
-                self.pos += 1
-                continue
-            elif self.text[self.pos].isdigit():
-                tokens.append(self.get_number())
-            elif self.text[self.pos].isalpha():
-                tokens.append(self.get_identifier())
-            elif self.text[self.pos] in "+-*/()=<>":
-                tokens.append(Token("OPERATOR", self.text[self.pos]))
-                self.pos += 1
-            else:
-                raise Exception(f"Unknown symbol: {self.text[self.pos]}")
-        return tokens
-
-    def get_number(self):
-        """
-        Extracts a number token from the input text.
-
-        Returns:
-            Token: A Token object representing a number.
-        """
-        num = ""
-        while self.pos < len(self.text) and self.text[self.pos].isdigit():
-            num += self.text[self.pos]
-            self.pos += 1
-        return Token("NUMBER", int(num))
+# Maps each binary operator token to its (precedence, operator id).
+_BINARY_OPERATORS = {"+": (1, OP_ADD), "-": (1, OP_SUB), "*": (2, OP_MUL), "/": (2, OP_DIV)}
+_NOT_BINARY = (0, None)
+_END = (None, None)
 
-    def get_identifier(self):
-        """
-        Extracts an identifier or keyword token from the input text.
+# Magnitude at which a result may no longer fit in an int64. It sits just under
+# 2 ** 63 so float rounding cannot hide an overflow.
+_INT64_LIMIT = 9.2e18
+LOAD_CONST, LOAD_VAR, STORE_VAR, ADD, SUB, MUL, JMP, JZ, SET_RESULT, CLEAR_RESULT = range(10)
+# Net change in stack depth caused by each opcode.
+STACK_EFFECT = (1, 1, 0, -1, -1, -1, 0, -1, -1, 0)
 
-        Returns:
-            Token: A Token object representing an identifier or keyword.
-        """
-        id = ""
-        while self.pos < len(self.text) and self.text[self.pos].isalnum():
-            id += self.text[self.pos]
-            self.pos += 1
-        keywords = ["if", "else", "while", "def"]
-        if id in keywords:
-            return Token("KEYWORD", id)
-        return Token("IDENTIFIER", id)
+# Indexed by operator id.
+BINARY_OPS = (operator.add, operator.sub, operator.mul, operator.truediv)
 
 
 ##########################################
@@ -99,7 +37,7 @@ class Lexer:
 
 class ASTNode:
     """Base class for all nodes in the Abstract Syntax Tree (AST)."""
-    pass
+    __slots__ = ()
 
 
 class BinaryOpNode(ASTNode):
@@ -108,17 +46,19 @@ class BinaryOpNode(ASTNode):
 
     Attributes:
         left (ASTNode): The left operand of the operation.
-        op (str): The operator (e.g., '+', '-', '*', '/').
+        op (int): The operator id (OP_ADD, OP_SUB, OP_MUL or OP_DIV).
         right (ASTNode): The right operand of the operation.
     """
 
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op, right):
         """
         Initializes a BinaryOpNode with the given left operand, operator, and right operand.
 
         Args:
             left (ASTNode): The left operand.
-            op (str): The operator.
+            op (int): The operator id.
             right (ASTNode): The right operand.
         """
         self.left = left
@@ -134,6 +74,8 @@ class NumberNode(ASTNode):
         value (int): The numeric value of the node.
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value):
         """
         Initializes a NumberNode with a given value.
@@ -152,6 +94,8 @@ class VariableNode(ASTNode):
         name (str): The name of the variable.
     """
 
+    __slots__ = ("name",)
+
     def __init__(self, name):
         """
         Initializes a VariableNode with a given variable name.
@@ -171,6 +115,8 @@ class AssignmentNode(ASTNode):
         value (ASTNode): The value to be assigned.
     """
 
+    __slots__ = ("name", "value")
+
     def __init__(self, name, value):
         """
         Initializes an AssignmentNode with the given variable name and value.
@@ -193,6 +139,8 @@ class IfNode(ASTNode):
         else_body (ASTNode, optional): The statement(s) to execute if the condition is false.
     """
 
+    __slots__ = ("condition", "if_body", "else_body")
+
     def __init__(self, condition, if_body, else_body=None):
         """
         Initializes an IfNode with a condition, if body, and optional else body.
@@ -216,6 +164,8 @@ class WhileNode(ASTNode):
         body (ASTNode): The statement(s) to execute while the condition is true.
     """
 
+    __slots__ = ("condition", "body")
+
     def __init__(self, condition, body):
         """
         Initializes a WhileNode with a condition and body.
@@ -228,33 +178,244 @@ class WhileNode(ASTNode):
         self.body = body
 
 
+class VariableSlotNode(ASTNode):
+    """
+    Represents a variable node whose storage slot was resolved by optimize().
+
+    Attributes:
+        name (str): The name of the variable.
+        slot (int): The index of the variable in the interpreter's storage.
+    """
+
+    __slots__ = ("name", "slot")
+
+    def __init__(self, name, slot):
+        """
+        Initializes a VariableSlotNode with a variable name and slot.
+
+        Args:
+            name (str): The name of the variable.
+            slot (int): The storage slot of the variable.
+        """
+        self.name = name
+        self.slot = slot
+
+
+class SlotAssignmentNode(ASTNode):
+    """
+    Represents an assignment node whose target slot was resolved by optimize().
+
+    Attributes:
+        name (str): The name of the variable to assign a value to.
+        slot (int): The storage slot of the variable.
+        value (ASTNode): The value to be assigned.
+    """
+
+    __slots__ = ("name", "slot", "value")
+
+    def __init__(self, name, slot, value):
+        """
+        Initializes a SlotAssignmentNode with a variable name, slot and value.
+
+        Args:
+            name (str): The name of the variable.
+            slot (int): The storage slot of the variable.
+            value (ASTNode): The value to be assigned.
+        """
+        self.name = name
+        self.slot = slot
+        self.value = value
+
+
+class CompiledWhileNode(ASTNode):
+    """
+    Represents a while loop that optimize() lowered to bytecode.
+
+    Attributes:
+        program (Program): The compiled loop, also inlined by whole-program compilation.
+    """
+
+    __slots__ = ("program",)
+
+    def __init__(self, program):
+        """
+        Initializes a CompiledWhileNode with its compiled program.
+
+        Args:
+            program (Program): The compiled loop.
+        """
+        self.program = program
+
+
+def optimize(node, slots):
+    """
+    Rewrites an AST once before execution.
+
+    Binary operations on two constants are folded into a single NumberNode (unless
+    evaluating them raises, which is left to runtime), and every variable reference is resolved to a storage slot, allocating new slots
+    in `slots` as names are first seen. While loops whose condition and body
+    the Compiler supports are compiled once into a CompiledWhileNode, so they
+    run in the bytecode loop even when the surrounding program cannot.
+
+    Args:
+        node (ASTNode): The root of the AST to optimize.
+        slots (dict): Maps variable names to slots; updated in place.
+
+    Returns:
+        ASTNode: The optimized AST.
+    """
+    if isinstance(node, BinaryOpNode):
+        left = optimize(node.left, slots)
+        right = optimize(node.right, slots)
+        if isinstance(left, NumberNode) and isinstance(right, NumberNode):
+            try:
+                return NumberNode(BINARY_OPS[node.op](left.value, right.value))
+            except ArithmeticError:
+                # Leave the error to runtime, where it only surfaces if this code runs.
+                pass
+        return BinaryOpNode(left, node.op, right)
+    elif isinstance(node, VariableNode):
+        return VariableSlotNode(node.name, slots.setdefault(node.name, len(slots)))
+    elif isinstance(node, AssignmentNode):
+        value = optimize(node.value, slots)
+        return SlotAssignmentNode(node.name, slots.setdefault(node.name, len(slots)), value)
+    elif isinstance(node, IfNode):
+        return IfNode(optimize(node.condition, slots), optimize(node.if_body, slots),
+                      optimize(node.else_body, slots))
+    elif isinstance(node, WhileNode):
+        loop = WhileNode(optimize(node.condition, slots), optimize(node.body, slots))
+        try:
+            return CompiledWhileNode(Compiler().compile(loop))
+        except CompileError:
+            return loop
+    return node
+
+
+_rule_ids = itertools.count()
+
+
+def memoize_rule(rule):
+    """
+    Opt-in packrat memoization for a single Parser rule.
+
+    The current grammar never backtracks, so every rule runs at most once per
+    position and a memo table would only add lookups and memory. Apply this to
+    individual rules that start backtracking, and only after comparing them
+    with benchmark(). Results are stored in the parser's memo table under an
+    integer rule id and the start position (plus any rule arguments); the table
+    is shared by reference and never copied. The backtracking caller must hold
+    a Parser.mark() so that the tokens it rewinds over stay buffered.
+
+    Args:
+        rule (function): The Parser method to memoize.
+
+    Returns:
+        function: The memoizing wrapper.
+    """
+    rule_id = next(_rule_ids)
+
+    @functools.wraps(rule)
+    def wrapper(self, *args):
+        key = (rule_id, self.pos) + args
+        entry = self.memo.get(key)
+        if entry is None:
+            result = rule(self, *args)
+            self.memo[key] = (result, self.pos)
+            return result
+        result, self.pos = entry
+        return result
+
+    return wrapper
+
+
 class Parser:
     """
-    Parses a list of tokens into an Abstract Syntax Tree (AST).
+    Parses a stream of tokens into an Abstract Syntax Tree (AST).
+
+    Tokens are pulled from the stream only as far as lookahead requires, so
+    the Lexer's generator can feed the Parser without materializing a list.
+    Consumed tokens are dropped unless a mark() is held, which lets
+    backtracking rules rewind.
 
     Attributes:
-        tokens (list): The list of tokens to parse.
-        pos (int): The current position in the list of tokens.
+        memo (dict): The packrat table used by rules decorated with memoize_rule.
     """
 
     def __init__(self, tokens):
         """
-        Initializes the Parser with a list of tokens.
+        Initializes the Parser with a token stream.
 
         Args:
-            tokens (list): The list of tokens to parse.
+            tokens (iterable): The tokens to parse, e.g. a list or Lexer.tokens().
+        """
+        self._iter = iter(tokens)
+        self._tokens = deque()
+        self._offset = 0
+        self._index = 0
+        self._marks = 0
+        self.memo = {}
+
+    @property
+    def pos(self):
+        """int: The number of tokens consumed so far."""
+        return self._offset + self._index
+
+    @pos.setter
+    def pos(self, pos):
+        index = pos - self._offset
+        if index < 0:
+            raise Exception("Cannot rewind over released tokens without a mark")
+        if index > 0 and self._peek(index - 1 - self._index) is _END:
+            raise Exception("Cannot move past the end of input")
+        self._index = index
+        if not self._marks:
+            self._drop_consumed()
+
+    def mark(self):
+        """
+        Keeps consumed tokens buffered until the matching release().
+
+        Returns:
+            int: The current position, which reset() can return to.
         """
-        self.tokens = tokens
-        self.pos = 0
+        self._marks += 1
+        return self.pos
+
+    def reset(self, pos):
+        """
+        Moves back (or forward) to a position recorded while a mark is held.
+
+        Args:
+            pos (int): The position to move to.
+        """
+        self.pos = pos
+
+    def release(self):
+        """Releases the innermost mark(); consumed tokens are dropped once none is held."""
+        self._marks -= 1
+        if not self._marks:
+            self._drop_consumed()
+
+    def _drop_consumed(self):
+        """Drops the buffered tokens before the current position."""
+        for _ in range(self._index):
+            self._tokens.popleft()
+        self._offset += self._index
+        self._index = 0
 
     def parse(self):
         """
         Parses the tokens into an AST.
 
+        Only the first statement is parsed, but the rest of the stream is still
+        drained so that a lazy Lexer reports unknown symbols anywhere in the input.
+
         Returns:
             ASTNode: The root node of the parsed AST.
         """
-        return self.statement()
+        node = self.statement()
+        deque(self._iter, maxlen=0)
+        return node
 
     def statement(self):
         """
@@ -263,15 +424,15 @@ class Parser:
         Returns:
             ASTNode: The parsed statement node.
         """
-        if self.pos >= len(self.tokens):
+        type_, value = self._peek()
+        if type_ is None:
             return None
-        if self.current_token().type == "KEYWORD":
-            if self.current_token().value == "if":
+        if type_ == TT.KEYWORD:
+            if value == "if":
                 return self.if_statement()
-            elif self.current_token().value == "while":
+            elif value == "while":
                 return self.while_statement()
-        elif (self.current_token().type == "IDENTIFIER" and self.peek_next_token() and
-              self.peek_next_token().type == "OPERATOR" and self.peek_next_token().value == "="):
+        elif type_ == TT.IDENTIFIER and self._peek(1) == (TT.OPERATOR, "="):
             return self.assignment()
         else:
             return self.expression()
@@ -283,13 +444,12 @@ class Parser:
         Returns:
             IfNode: The parsed if-else node.
         """
-        self.consume("KEYWORD", "if")
+        self.consume(TT.KEYWORD, "if")
         condition = self.expression()
         if_body = self.statement()
         else_body = None
-        if (self.pos < len(self.tokens) and self.current_token().type == "KEYWORD" and
-                self.current_token().value == "else"):
-            self.consume("KEYWORD", "else")
+        if self._peek() == (TT.KEYWORD, "else"):
+            self.consume(TT.KEYWORD, "else")
             else_body = self.statement()
         return IfNode(condition, if_body, else_body)
 
@@ -300,7 +460,7 @@ class Parser:
         Returns:
             WhileNode: The parsed while loop node.
         """
-        self.consume("KEYWORD", "while")
+        self.consume(TT.KEYWORD, "while")
         condition = self.expression()
         body = self.statement()
         return WhileNode(condition, body)
@@ -312,49 +472,44 @@ class Parser:
         Returns:
             AssignmentNode: The parsed assignment node.
         """
-        name = self.consume("IDENTIFIER").value
-        self.consume("OPERATOR", "=")
+        name = self.consume(TT.IDENTIFIER).value
+        self.consume(TT.OPERATOR, "=")
         value = self.expression()
         return AssignmentNode(name, value)
 
     def expression(self):
         """
-        Parses an expression, starting with addition and subtraction.
+        Parses an expression.
 
         Returns:
             ASTNode: The parsed expression node.
         """
-        return self.addition()
+        return self._parse_expr()
 
-    def addition(self):
+    def _parse_expr(self, min_prec=1):
         """
-        Parses an addition or subtraction operation.
+        Parses a binary expression by precedence climbing.
 
-        Returns:
-            ASTNode: The parsed addition or subtraction node.
-        """
-        node = self.multiplication()
-        while (self.pos < len(self.tokens) and self.current_token().type == "OPERATOR" and
-               self.current_token().value in ("+", "-")):
-            op = self.consume("OPERATOR").value
-            right = self.multiplication()
-            node = BinaryOpNode(node, op, right)
-        return node
+        Operators at or above `min_prec` are folded into the left operand in a
+        single loop; only a tighter-binding right operand recurses.
 
-    def multiplication(self):
-        """
-        Parses a multiplication or division operation.
+        Args:
+            min_prec (int, optional): The lowest operator precedence to consume.
 
         Returns:
-            ASTNode: The parsed multiplication or division node.
-        """
-        node = self.primary()
-        while (self.pos < len(self.tokens) and self.current_token().type == "OPERATOR" and
-               self.current_token().value in ("*", "/")):
-            op = self.consume("OPERATOR").value
-            right = self.primary()
-            node = BinaryOpNode(node, op, right)
-        return node
+            ASTNode: The parsed expression node.
+        """
+        operator_ = TT.OPERATOR
+        left = self.primary()
+        while True:
+            type_, value = self._peek()
+            prec, op = _BINARY_OPERATORS.get(value, _NOT_BINARY)
+            if type_ != operator_ or prec < min_prec:
+                break
+            self._next()
+            right = self._parse_expr(prec + 1)
+            left = BinaryOpNode(left, op, right)
+        return left
 
     def primary(self):
         """
@@ -363,55 +518,68 @@ class Parser:
         Returns:
             ASTNode: The parsed primary expression node.
         """
-        if self.current_token().type == "NUMBER":
-            return NumberNode(self.consume("NUMBER").value)
-        elif self.current_token().type == "IDENTIFIER":
-            return VariableNode(self.consume("IDENTIFIER").value)
+        type_, value = self._peek()
+        if type_ == TT.NUMBER:
+            self._next()
+            return NumberNode(value)
+        elif type_ == TT.IDENTIFIER:
+            self._next()
+            return VariableNode(value)
         else:
             raise Exception("Number or identifier expected")
 
-    def current_token(self):
+    def _peek(self, k=0):
         """
-        Returns the current token.
+        Looks ahead without consuming tokens.
+
+        Args:
+            k (int, optional): How many tokens past the current one to look.
 
         Returns:
-            Token: The current token.
+            tuple: The (type, value) of the token, or (None, None) past the end.
         """
-        if self.pos >= len(self.tokens):
-            return None
-        return self.tokens[self.pos]
-
-    def peek_next_token(self):
+        tokens = self._tokens
+        index = self._index + k
+        while len(tokens) <= index:
+            token = next(self._iter, None)
+            if token is None:
+                return _END
+            tokens.append(token)
+        return tokens[index]
+
+    def _next(self):
         """
-        Peeks at the next token without consuming it.
+        Consumes the current token, which must already be buffered by _peek().
 
         Returns:
-            Token: The next token, or None if at the end.
+            Token: The consumed token.
         """
-        if self.pos + 1 < len(self.tokens):
-            return self.tokens[self.pos + 1]
-        return None
+        if self._marks:
+            token = self._tokens[self._index]
+            self._index += 1
+            return token
+        self._offset += 1
+        return self._tokens.popleft()
 
     def consume(self, expected_type, expected_value=None):
         """
         Consumes the current token if it matches the expected type and value.
 
         Args:
-            expected_type (str): The expected token type.
+            expected_type (TT): The expected token type.
             expected_value (str, optional): The expected token value.
 
         Returns:
             Token: The consumed token.
         """
-        if self.pos >= len(self.tokens):
+        token = self._peek()
+        if token is _END:
             raise Exception("Unexpected end of input")
-        if self.current_token().type != expected_type:
-            raise Exception(f"Expected token of type {expected_type}, received {self.current_token().type}")
-        if expected_value and self.current_token().value != expected_value:
-            raise Exception(f"Expected value {expected_value}, received {self.current_token().value}")
-        token = self.current_token()
-        self.pos += 1
-        return token
+        if token.type != expected_type:
+            raise Exception(f"Expected token of type {expected_type.name}, received {token.type.name}")
+        if expected_value and token.value != expected_value:
+            raise Exception(f"Expected value {expected_value}, received {token.value}")
+        return self._next()
 
 
 #######################################
@@ -422,14 +590,45 @@ class Interpreter:
     Interprets the Abstract Syntax Tree (AST) to execute the code.
 
     Attributes:
-        variables (dict): A dictionary that stores variable values.
+        variables (list): The variable values, indexed by slot.
+        slots (dict): Maps each variable name to its slot in `variables`.
     """
 
     def __init__(self):
         """
-        Initializes the Interpreter with an empty variables' dictionary.
+        Initializes the Interpreter with empty variable storage
+        and the node type to handler dispatch table.
+        """
+        self.variables = []
+        self.slots = {}
+        self._dispatch = {
+            NumberNode: self._number,
+            VariableNode: self._variable,
+            VariableSlotNode: self._variable_slot,
+            BinaryOpNode: self._binary_op,
+            AssignmentNode: self._assignment,
+            SlotAssignmentNode: self._slot_assignment,
+            IfNode: self._if,
+            WhileNode: self._while,
+            CompiledWhileNode: self._compiled_while,
+        }
+
+    def run(self, node):
         """
-        self.variables = {}
+        Optimizes the AST, then executes it as bytecode when the Compiler supports it.
+        Falls back to the tree-walking interpret() otherwise.
+        Args:
+            node (ASTNode): The root of the AST to execute.
+        Returns:
+            int: The result of the execution.
+        """
+        node = optimize(node, self.slots)
+        self.variables.extend([0] * (len(self.slots) - len(self.variables)))
+        try:
+            program = Compiler().compile(node)
+        except CompileError:
+            return self.interpret(node)
+        return program.execute(self.variables)
 
     def interpret(self, node):
         """
@@ -439,39 +638,384 @@ class Interpreter:
         Returns:
             int: The result of the interpretation.
         """
+        handler = self._dispatch.get(type(node))
+        if handler is None:
+            raise Exception(f"Unknown node type: {type(node)}")
+        return handler(node)
+
+    def _number(self, node):
+        """Evaluates a NumberNode."""
+        return node.value
+
+    def _variable(self, node):
+        """Evaluates a VariableNode; unset variables read as 0."""
+        slot = self.slots.get(node.name)
+        if slot is None:
+            return 0
+        return self.variables[slot]
+
+    def _variable_slot(self, node):
+        """Evaluates a VariableSlotNode."""
+        return self.variables[node.slot]
+
+    def _binary_op(self, node):
+        """Evaluates a BinaryOpNode."""
+        left = self.interpret(node.left)
+        right = self.interpret(node.right)
+        if node.op == OP_DIV and right == 0:
+            raise Exception("Division by zero")
+        return BINARY_OPS[node.op](left, right)
+
+    def _assignment(self, node):
+        """Evaluates an AssignmentNode and returns the assigned value."""
+        value = self.interpret(node.value)
+        self.variables[self.slot(node.name)] = value
+        return value
+
+    def _slot_assignment(self, node):
+        """Evaluates a SlotAssignmentNode and returns the assigned value."""
+        value = self.interpret(node.value)
+        self.variables[node.slot] = value
+        return value
+
+    def _if(self, node):
+        """Evaluates an IfNode."""
+        if self.interpret(node.condition):
+            return self.interpret(node.if_body)
+        elif node.else_body:
+            return self.interpret(node.else_body)
+
+    def _while(self, node):
+        """Evaluates a WhileNode and returns the result of the last iteration."""
+        result = None
+        while self.interpret(node.condition):
+            result = self.interpret(node.body)
+        return result
+
+    def _compiled_while(self, node):
+        """Runs a CompiledWhileNode in the bytecode loop."""
+        return node.program.execute(self.variables)
+
+    def slot(self, name):
+        """
+        Returns the storage slot of a variable, allocating it on first use.
+        Args:
+            name (str): The name of the variable.
+        Returns:
+            int: The slot of the variable in `variables`.
+        """
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.slots)
+        self.variables.extend([0] * (len(self.slots) - len(self.variables)))
+        return slot
+
+
+######################################
+
+
+class CompileError(Exception):
+    """Raised when an AST contains constructs the bytecode Compiler does not support."""
+    pass
+
+
+class Program:
+    """
+    Represents a flat bytecode program produced by the Compiler.
+
+    Constants are int64, but computed values are not bounded: any result that
+    leaves the int64 range is recomputed as an exact Python int by execute().
+
+    Attributes:
+        code (list): The opcode of each instruction.
+        args (list): The integer operand of each instruction (0 when unused).
+        consts (array): The unboxed 64-bit constants referenced by LOAD_CONST.
+        depth (int): The maximum operand stack depth the program reaches.
+    """
+
+    def __init__(self, code, args, consts, depth):
+        """
+        Initializes a Program with its instruction arrays.
+
+        When NumPy is available the int64 arrays handed to the Numba loop are
+        built once here; the constants are shared with `consts` without copying.
+
+        Args:
+            code (list): The opcode of each instruction.
+            args (list): The integer operand of each instruction.
+            consts (array): The constant pool.
+            depth (int): The maximum operand stack depth.
+        """
+        self.code = code
+        self.args = args
+        self.consts = consts
+        self.depth = depth
+        if np is not None:
+            self._arrays = (np.array(code, dtype=np.int64), np.array(args, dtype=np.int64),
+                            np.frombuffer(consts, dtype=np.int64) if consts else np.empty(0, dtype=np.int64))
+
+    def execute(self, variables):
+        """
+        Runs the program against the interpreter's slot storage, updating it in place.
+
+        The Numba-compiled dispatch loop is used when Numba is installed and every
+        value fits in a 64-bit integer; otherwise the same loop runs as plain Python.
+        The compiled loop works on a copy of the variables, so when an intermediate
+        result overflows int64 the copy is dropped and the program reruns as plain
+        Python from the untouched variables.
+
+        Args:
+            variables (list): The variable values, indexed by slot.
+
+        Returns:
+            int: The result of the last executed statement, or None.
+        """
+        if _run_bytecode_jit is not None and _fits_int64(variables):
+            values = np.array(variables, dtype=np.int64)
+            result, has_result, overflow = _run_bytecode_jit(*self._arrays, values,
+                                                             np.empty(self.depth, dtype=np.int64), True)
+            if not overflow:
+                variables[:] = values.tolist()
+                return int(result) if has_result else None
+        result, has_result, _ = run_bytecode(self.code, self.args, self.consts, variables, [0] * self.depth)
+        return result if has_result else None
+
+
+class Compiler:
+    """
+    Lowers an Abstract Syntax Tree (AST) into a flat bytecode Program.
+
+    The AST must already be resolved to variable slots by optimize(). Only integer
+    arithmetic, assignments, if-else and while loops are lowered. Anything else
+    (e.g. division, which produces floats) raises CompileError so the caller can
+    fall back to the tree-walking Interpreter.
+
+    Attributes:
+        code (list): The emitted opcodes.
+        args (list): The emitted operands.
+        consts (array): The constant pool.
+        depth (int): The current operand stack depth.
+        max_depth (int): The deepest the operand stack gets.
+    """
+
+    BINARY_OPCODES = {OP_ADD: ADD, OP_SUB: SUB, OP_MUL: MUL}
+
+    def __init__(self):
+        """
+        Initializes the Compiler with empty instruction arrays.
+        """
+        self.code = []
+        self.args = []
+        self.consts = array("q")
+        self.depth = 0
+        self.max_depth = 0
+
+    def compile(self, node):
+        """
+        Compiles an AST into a Program.
+
+        Args:
+            node (ASTNode): The root of the AST to compile.
+
+        Returns:
+            Program: The compiled program.
+        """
+        self.statement(node)
+        return Program(self.code, self.args, self.consts, self.max_depth)
+
+    def statement(self, node):
+        """
+        Compiles a statement, leaving its value in the result register.
+
+        Args:
+            node (ASTNode): The statement node to compile.
+        """
+        if isinstance(node, IfNode):
+            self.expression(node.condition)
+            jump_else = self.emit(JZ)
+            self.statement(node.if_body)
+            jump_end = self.emit(JMP)
+            self.patch(jump_else)
+            if node.else_body:
+                self.statement(node.else_body)
+            else:
+                self.emit(CLEAR_RESULT)
+            self.patch(jump_end)
+        elif isinstance(node, WhileNode):
+            self.emit(CLEAR_RESULT)
+            start = len(self.code)
+            self.expression(node.condition)
+            jump_end = self.emit(JZ)
+            self.statement(node.body)
+            self.emit(JMP, start)
+            self.patch(jump_end)
+        elif isinstance(node, CompiledWhileNode):
+            self.inline(node.program)
+        else:
+            self.expression(node)
+            self.emit(SET_RESULT)
+
+    def expression(self, node):
+        """
+        Compiles an expression, leaving its value on top of the stack.
+
+        Args:
+            node (ASTNode): The expression node to compile.
+        """
         if isinstance(node, NumberNode):
-            return node.value
-        elif isinstance(node, VariableNode):
-            return self.variables.get(node.name, 0)
+            if not _fits_int64((node.value,)):
+                raise CompileError(f"Unsupported constant: {node.value!r}")
+            self.emit(LOAD_CONST, len(self.consts))
+            self.consts.append(node.value)
+        elif isinstance(node, VariableSlotNode):
+            self.emit(LOAD_VAR, node.slot)
         elif isinstance(node, BinaryOpNode):
-            left = self.interpret(node.left)
-            right = self.interpret(node.right)
-            if node.op == '+':
-                return left + right
-            elif node.op == '-':
-                return left - right
-            elif node.op == '*':
-                return left * right
-            elif node.op == '/':
-                if right == 0:
-                    raise Exception("Division by zero")
-                return left / right
-        elif isinstance(node, AssignmentNode):
-            value = self.interpret(node.value)
-            self.variables[node.name] = value
-            return value
-        elif isinstance(node, IfNode):
-            if self.interpret(node.condition):
-                return self.interpret(node.if_body)
-            elif node.else_body:
-                return self.interpret(node.else_body)
-        elif isinstance(node, WhileNode):
-            result = None
-            while self.interpret(node.condition):
-                result = self.interpret(node.body)
-            return result
+            opcode = self.BINARY_OPCODES.get(node.op)
+            if opcode is None:
+                raise CompileError(f"Unsupported operator: {node.op}")
+            self.expression(node.left)
+            self.expression(node.right)
+            self.emit(opcode)
+        elif isinstance(node, SlotAssignmentNode):
+            self.expression(node.value)
+            self.emit(STORE_VAR, node.slot)
         else:
-            raise Exception(f"Unknown node type: {type(node)}")
+            raise CompileError(f"Unsupported node type: {type(node)}")
+
+    def emit(self, opcode, arg=0):
+        """
+        Appends an instruction to the program.
+
+        Args:
+            opcode (int): The opcode.
+            arg (int, optional): The operand.
+
+        Returns:
+            int: The index of the emitted instruction.
+        """
+        self.code.append(opcode)
+        self.args.append(arg)
+        self.depth += STACK_EFFECT[opcode]
+        self.max_depth = max(self.max_depth, self.depth)
+        return len(self.code) - 1
+
+    def inline(self, program):
+        """
+        Appends an already compiled Program, relocating its jump targets and
+        constant indices so the instructions are not compiled a second time.
+
+        Args:
+            program (Program): The program to append.
+        """
+        code_base = len(self.code)
+        const_base = len(self.consts)
+        for opcode, arg in zip(program.code, program.args):
+            if opcode == JMP or opcode == JZ:
+                arg += code_base
+            elif opcode == LOAD_CONST:
+                arg += const_base
+            self.emit(opcode, arg)
+        self.consts.extend(program.consts)
+
+    def patch(self, index):
+        """
+        Points the jump at the given index to the next instruction to be emitted.
+
+        Args:
+            index (int): The index of the jump instruction.
+        """
+        self.args[index] = len(self.code)
+
+
+def run_bytecode(code, args, consts, variables, stack, check_overflow=False):
+    """
+    Executes a bytecode program in a single dispatch loop.
+
+    Operands live in a preallocated stack indexed by `sp`, so under Numba every
+    value stays an unboxed int64 until the result is returned. Int64 arithmetic
+    wraps, so the Numba caller sets `check_overflow` and the loop stops at the
+    first add, subtract or multiply whose result may not fit in an int64.
+
+    Args:
+        code (list): The opcode of each instruction.
+        args (list): The operand of each instruction.
+        consts (array): The constant pool.
+        variables (list): The variable values, indexed by slot; updated in place.
+        stack (list): Scratch space of at least the program's maximum stack depth.
+        check_overflow (bool, optional): Whether to stop on int64 overflow.
+
+    Returns:
+        tuple: The last statement result, whether a result was produced and
+        whether the loop stopped on overflow.
+    """
+    sp = 0
+    result = 0
+    has_result = False
+    pc = 0
+    n = len(code)
+    while pc < n:
+        op = code[pc]
+        if op == LOAD_CONST:
+            stack[sp] = consts[args[pc]]
+            sp += 1
+        elif op == LOAD_VAR:
+            stack[sp] = variables[args[pc]]
+            sp += 1
+        elif op == STORE_VAR:
+            variables[args[pc]] = stack[sp - 1]
+        elif op == ADD:
+            sp -= 1
+            a = stack[sp - 1]
+            b = stack[sp]
+            if check_overflow and abs(float(a) + float(b)) >= _INT64_LIMIT:
+                return result, has_result, True
+            stack[sp - 1] = a + b
+        elif op == SUB:
+            sp -= 1
+            a = stack[sp - 1]
+            b = stack[sp]
+            if check_overflow and abs(float(a) - float(b)) >= _INT64_LIMIT:
+                return result, has_result, True
+            stack[sp - 1] = a - b
+        elif op == MUL:
+            sp -= 1
+            a = stack[sp - 1]
+            b = stack[sp]
+            if check_overflow and abs(float(a) * float(b)) >= _INT64_LIMIT:
+                return result, has_result, True
+            stack[sp - 1] = a * b
+        elif op == JMP:
+            pc = args[pc]
+            continue
+        elif op == JZ:
+            sp -= 1
+            if stack[sp] == 0:
+                pc = args[pc]
+                continue
+        elif op == SET_RESULT:
+            sp -= 1
+            result = stack[sp]
+            has_result = True
+        elif op == CLEAR_RESULT:
+            has_result = False
+        pc += 1
+    return result, has_result, False
+
+
+_run_bytecode_jit = njit(cache=True)(run_bytecode) if njit is not None else None
+
+
+def _fits_int64(values):
+    """
+    Checks whether every value is a plain int representable in 64 bits.
+
+    Args:
+        values (list): The values to check.
+
+    Returns:
+        bool: True if the values can be stored in an int64 array.
+    """
+    return all(type(v) is int and -2 ** 63 <= v < 2 ** 63 for v in values)
 
 
 ######################################
@@ -486,13 +1030,53 @@ def run_test(code):
     ast = parser.parse()
     print("AST:", ast)
     interpreter = Interpreter()
-    result = interpreter.interpret(ast)
+    result = interpreter.run(ast)
     print("Result:", result)
     return result
 
 
+def run_many(codes):
+    """
+    Runs several programs back to back, each in a fresh Interpreter.
+
+    The token regex and the Numba dispatch loop are module-level and shared by
+    every program. The loop is warmed up on a trivial program first, so its
+    one-off JIT compilation (or cache load) is not charged to the first program.
+
+    Args:
+        codes (list): The source code of each program.
+
+    Returns:
+        list: The result of each program.
+    """
+    Interpreter().run(NumberNode(0))
+    return [Interpreter().run(Parser(Lexer(code).tokens()).parse()) for code in codes]
+
+
+def benchmark(code, number=1000):
+    """
+    Times lexing and parsing of the given code.
+
+    Run it before and after decorating a rule with memoize_rule; memoization
+    only pays off when the rule actually backtracks.
+
+    Args:
+        code (str): The source code to parse.
+        number (int, optional): How many times to parse it.
+
+    Returns:
+        float: The total time in seconds.
+    """
+    seconds = timeit.timeit(lambda: Parser(Lexer(code).tokens()).parse(), number=number)
+    print(f"Parsed {number} times in {seconds:.4f}s")
+    return seconds
+
+
 # Tests
-run_test("2 + 3 * 4")
-run_test("x = 5\ny = 3\nx + y")
-run_test("x = 10\nif x > 5\n    x * 2\nelse\n    x / 2")
-run_test("x = 0\nwhile x < 5\n    x = x + 1\nx")
+if __name__ == "__main__":
+    run_test("2 + 3 * 4")
+    run_test("x = 5\ny = 3\nx + y")
+    run_test("x = 10\nif x > 5\n    x * 2\nelse\n    x / 2")
+    run_test("x = 0\nwhile x < 5\n    x = x + 1\nx")
+    run_test("if 0 " + "9" * 400 + " / 3 else 1")
+    run_test("if 0 1 / 3 * " + "9" * 400 + " else 1")
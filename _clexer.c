@@ -0,0 +1,274 @@
+/*
+ * Optional C implementation of the Shemaython lexer.
+ *
+ * lex(text: str, pos: int, limit: int) -> (types: list[int], values: list[int | str], end: int)
+ *
+ * Scans ASCII source from pos and returns up to limit token types (TT values)
+ * and token values as two parallel lists, plus the offset where scanning
+ * stopped: after the last token when the limit is reached, otherwise at the
+ * end of the text or at the first unknown character. It accepts exactly what
+ * lexer._TOKEN_RE accepts on ASCII text; lexer.py falls back to the regex scan
+ * when this module is not built or the input is not ASCII.
+ *
+ * The tables below are copies of lexer.py's. The module exports them as
+ * KEYWORDS, TOKEN_TYPES and WHITESPACE, and lexer.py refuses a build whose
+ * copies no longer match.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <string.h>
+
+/* Must match lexer.TT. */
+enum { TT_NUMBER = 0, TT_OPERATOR = 1, TT_IDENTIFIER = 2, TT_KEYWORD = 3 };
+
+static const char *const TOKEN_TYPE_NAMES[] = {
+    [TT_NUMBER] = "NUMBER", [TT_OPERATOR] = "OPERATOR", [TT_IDENTIFIER] = "IDENTIFIER", [TT_KEYWORD] = "KEYWORD",
+};
+
+/* Longest digit run that always fits in a long long. */
+#define FAST_DIGITS 18
+
+/* Must match lexer.KEYWORDS. */
+static const char *const KEYWORDS[] = {"if", "else", "while", "def", NULL};
+
+static PyObject *type_objects[4];
+static PyObject *operator_strings[128];
+
+/*
+ * Character classes, looked up with one indexed load per byte instead of a
+ * cascade of range tests. Bytes outside ASCII and unlisted bytes stay
+ * CLS_UNKNOWN.
+ */
+enum { CLS_UNKNOWN = 0, CLS_DIGIT, CLS_LETTER, CLS_OPERATOR, CLS_SPACE };
+
+static unsigned char char_class[256];
+
+static void
+init_char_class(void)
+{
+    for (int c = '0'; c <= '9'; c++) {
+        char_class[c] = CLS_DIGIT;
+    }
+    for (int c = 'A'; c <= 'Z'; c++) {
+        char_class[c] = CLS_LETTER;
+        char_class[c + ('a' - 'A')] = CLS_LETTER;
+    }
+    char_class['_'] = CLS_LETTER;
+    for (const char *op = "+-*/()=<>"; *op != '\0'; op++) {
+        char_class[(unsigned char)*op] = CLS_OPERATOR;
+    }
+    /* Same set as Python's \s on ASCII str: \t \n \v \f \r, \x1c-\x1f and space. */
+    for (int c = '\t'; c <= '\r'; c++) {
+        char_class[c] = CLS_SPACE;
+    }
+    for (int c = 0x1c; c <= ' '; c++) {
+        char_class[c] = CLS_SPACE;
+    }
+}
+
+static int
+is_keyword(const char *start, Py_ssize_t len)
+{
+    for (const char *const *kw = KEYWORDS; *kw != NULL; kw++) {
+        if ((Py_ssize_t)strlen(*kw) == len && memcmp(*kw, start, len) == 0) {
+            return 1;
+        }
+    }
+    return 0;
+}
+
+static PyObject *
+make_number(const char *start, Py_ssize_t len)
+{
+    if (len <= FAST_DIGITS) {
+        long long value = 0;
+        for (Py_ssize_t i = 0; i < len; i++) {
+            value = value * 10 + (start[i] - '0');
+        }
+        return PyLong_FromLongLong(value);
+    }
+    PyObject *text = PyUnicode_DecodeASCII(start, len, NULL);
+    if (text == NULL) {
+        return NULL;
+    }
+    PyObject *value = PyLong_FromUnicodeObject(text, 10);
+    Py_DECREF(text);
+    return value;
+}
+
+static PyObject *
+make_identifier(const char *start, Py_ssize_t len)
+{
+    PyObject *value = PyUnicode_DecodeASCII(start, len, NULL);
+    if (value != NULL) {
+        PyUnicode_InternInPlace(&value);
+    }
+    return value;
+}
+
+/* Appends one token; steals the reference to value. */
+static int
+append_token(PyObject *types, PyObject *values, int type, PyObject *value)
+{
+    if (value == NULL) {
+        return -1;
+    }
+    int status = PyList_Append(values, value);
+    Py_DECREF(value);
+    if (status < 0) {
+        return -1;
+    }
+    return PyList_Append(types, type_objects[type]);
+}
+
+static PyObject *
+lex(PyObject *module, PyObject *args)
+{
+    PyObject *text;
+    Py_ssize_t pos, limit;
+    if (!PyArg_ParseTuple(args, "Unn:lex", &text, &pos, &limit)) {
+        return NULL;
+    }
+#if PY_VERSION_HEX < 0x030C0000
+    if (PyUnicode_READY(text) < 0) {
+        return NULL;
+    }
+#endif
+    if (!PyUnicode_IS_ASCII(text)) {
+        PyErr_SetString(PyExc_ValueError, "lex() requires ASCII text");
+        return NULL;
+    }
+    Py_ssize_t n = PyUnicode_GET_LENGTH(text);
+    if (pos < 0 || pos > n) {
+        PyErr_SetString(PyExc_ValueError, "lex() position out of range");
+        return NULL;
+    }
+    PyObject *types = PyList_New(0);
+    PyObject *values = PyList_New(0);
+    if (types == NULL || values == NULL) {
+        goto error;
+    }
+    /* ASCII strings are stored one byte per character; scan them in place. */
+    const unsigned char *bytes = PyUnicode_1BYTE_DATA(text);
+    const char *data = (const char *)bytes;
+    /* Stops early at an unknown character; lexer.py reports it after the tokens before it. */
+    while (pos < n && char_class[bytes[pos]] != CLS_UNKNOWN && PyList_GET_SIZE(types) < limit) {
+        unsigned char c = bytes[pos];
+        Py_ssize_t start = pos;
+        int type;
+        switch (char_class[c]) {
+        case CLS_SPACE:
+            pos++;
+            break;
+        case CLS_DIGIT:
+            while (pos < n && char_class[bytes[pos]] == CLS_DIGIT) {
+                pos++;
+            }
+            if (append_token(types, values, TT_NUMBER, make_number(data + start, pos - start)) < 0) {
+                goto error;
+            }
+            break;
+        case CLS_LETTER:
+            while (pos < n && (char_class[bytes[pos]] == CLS_LETTER || char_class[bytes[pos]] == CLS_DIGIT)) {
+                pos++;
+            }
+            type = is_keyword(data + start, pos - start) ? TT_KEYWORD : TT_IDENTIFIER;
+            if (append_token(types, values, type, make_identifier(data + start, pos - start)) < 0) {
+                goto error;
+            }
+            break;
+        case CLS_OPERATOR:
+            pos++;
+            Py_INCREF(operator_strings[c]);
+            if (append_token(types, values, TT_OPERATOR, operator_strings[c]) < 0) {
+                goto error;
+            }
+            break;
+        }
+    }
+    PyObject *result = Py_BuildValue("(OOn)", types, values, pos);
+    Py_DECREF(types);
+    Py_DECREF(values);
+    return result;
+
+error:
+    Py_XDECREF(types);
+    Py_XDECREF(values);
+    return NULL;
+}
+
+static PyMethodDef clexer_methods[] = {
+    {"lex", lex, METH_VARARGS,
+     "lex(text: str, pos: int, limit: int) -> (types, values, end)\n\n"
+     "Tokenizes up to limit tokens of ASCII source into parallel lists."},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef clexer_module = {
+    PyModuleDef_HEAD_INIT, "_clexer", "C implementation of the Shemaython lexer.", -1, clexer_methods,
+};
+
+/* Exports the copied tables so lexer.py can check them against its own. */
+static int
+add_tables(PyObject *module)
+{
+    PyObject *keywords = PyList_New(0);
+    if (keywords == NULL) {
+        return -1;
+    }
+    for (const char *const *kw = KEYWORDS; *kw != NULL; kw++) {
+        PyObject *keyword = PyUnicode_FromString(*kw);
+        if (keyword == NULL || PyList_Append(keywords, keyword) < 0) {
+            Py_XDECREF(keyword);
+            Py_DECREF(keywords);
+            return -1;
+        }
+        Py_DECREF(keyword);
+    }
+    char whitespace[128];
+    Py_ssize_t count = 0;
+    for (int c = 0; c < 128; c++) {
+        if (char_class[c] == CLS_SPACE) {
+            whitespace[count++] = (char)c;
+        }
+    }
+    PyObject *tables[] = {
+        PyList_AsTuple(keywords),
+        Py_BuildValue("(ssss)", TOKEN_TYPE_NAMES[0], TOKEN_TYPE_NAMES[1], TOKEN_TYPE_NAMES[2], TOKEN_TYPE_NAMES[3]),
+        PyUnicode_DecodeASCII(whitespace, count, NULL),
+    };
+    static const char *const names[] = {"KEYWORDS", "TOKEN_TYPES", "WHITESPACE"};
+    Py_DECREF(keywords);
+    int status = 0;
+    for (int i = 0; i < 3; i++) {
+        if (status == 0 && (tables[i] == NULL || PyModule_AddObjectRef(module, names[i], tables[i]) < 0)) {
+            status = -1;
+        }
+        Py_XDECREF(tables[i]);
+    }
+    return status;
+}
+
+PyMODINIT_FUNC
+PyInit__clexer(void)
+{
+    init_char_class();
+    for (int type = 0; type < 4; type++) {
+        type_objects[type] = PyLong_FromLong(type);
+        if (type_objects[type] == NULL) {
+            return NULL;
+        }
+    }
+    for (const char *op = "+-*/()=<>"; *op != '\0'; op++) {
+        operator_strings[(unsigned char)*op] = PyUnicode_InternFromString((char[]){*op, '\0'});
+        if (operator_strings[(unsigned char)*op] == NULL) {
+            return NULL;
+        }
+    }
+    PyObject *module = PyModule_Create(&clexer_module);
+    if (module != NULL && add_tables(module) < 0) {
+        Py_CLEAR(module);
+    }
+    return module;
+}
@@ -0,0 +1,143 @@
+"""
+Lexer for Shemaython.
+
+Kept in its own module so it can optionally be compiled with mypyc
+(`python setup.py build_ext --inplace`); the interpreter imports the
+compiled extension transparently when it has been built. The same build
+step produces `_clexer`, a C scanner used for ASCII input when present.
+"""
+
+import re
+from enum import IntEnum
+from typing import Iterator, NamedTuple
+
+try:
+    import _clexer  # type: ignore
+except ImportError:
+    _clexer = None
+
+
+class TT(IntEnum):
+    """Token type tags produced by the Lexer."""
+    NUMBER = 0
+    OPERATOR = 1
+    IDENTIFIER = 2
+    KEYWORD = 3
+
+
+_TT_BY_VALUE = tuple(TT)
+
+KEYWORDS = frozenset({"if", "else", "while", "def"})
+
+_TOKEN_RE = re.compile(r"(?P<WS>\s+)|(?P<NUM>\d+)|(?P<ID>[A-Za-z_]\w*)|(?P<OP>[+\-*/()=<>])")
+
+# Number of tokens the C scanner produces per call, bounding what it buffers.
+_CLEX_CHUNK = 4096
+
+
+def _check_clexer() -> None:
+    """
+    Refuses a _clexer build whose tables no longer match this module.
+
+    _clexer.c keeps its own copies of KEYWORDS, the TT values and the ASCII
+    characters matched by \\s. If a copy diverges, the C scanner would
+    tokenize differently from the regex.
+
+    Raises:
+        ImportError: If any copied table differs.
+    """
+    whitespace = "".join(c for c in map(chr, range(128)) if re.fullmatch(r"\s", c))
+    if (frozenset(_clexer.KEYWORDS) != KEYWORDS or _clexer.TOKEN_TYPES != tuple(t.name for t in TT)
+            or _clexer.WHITESPACE != whitespace):
+        raise ImportError("_clexer is out of sync with lexer.py; rebuild it with "
+                          "`python setup.py build_ext --inplace`")
+
+
+if _clexer is not None:
+    _check_clexer()
+
+
+class Token(NamedTuple):
+    """
+    Represents a lexical token in the input.
+
+    Tokens are plain tuples, so they carry no per-instance dictionary.
+
+    Attributes:
+        type (TT): The type of the token (e.g., TT.NUMBER, TT.OPERATOR).
+        value (str or int): The value of the token (e.g., '5', '+').
+    """
+
+    type: TT
+    value: int | str
+
+
+class Lexer:
+    """
+    Performs lexical analysis, converting an input string into tokens.
+
+    Attributes:
+        text (str): The input string to be tokenized.
+        pos (int): The current position in the input string.
+    """
+
+    def __init__(self, text: str) -> None:
+        """
+        Initializes the Lexer with the input text.
+
+        Args:
+            text (str): The input string to be tokenized.
+        """
+        self.text: str = text
+        self.pos: int = 0
+
+    def tokenize(self) -> list[Token]:
+        """
+        Tokenizes the input text into a list of tokens.
+
+        Returns:
+            list: A list of Token objects.
+        """
+        return list(self.tokens())
+
+    def tokens(self) -> Iterator[Token]:
+        """
+        Lazily yields the tokens of the input text.
+
+        The input is scanned by a single compiled regular expression, or by the
+        C scanner in chunks of _CLEX_CHUNK tokens when it is built and the input
+        is ASCII. Either way, a character not covered by a token pattern is
+        reported as unknown once the tokens before it have been yielded.
+
+        Yields:
+            Token: The next token in the input.
+        """
+        number, operator_, identifier, keyword = TT.NUMBER, TT.OPERATOR, TT.IDENTIFIER, TT.KEYWORD
+        text = self.text
+        pos = self.pos
+        if _clexer is not None and text.isascii():
+            lex = _clexer.lex
+            kinds = _TT_BY_VALUE
+            while True:
+                types, values, pos = lex(text, pos, _CLEX_CHUNK)
+                for type_, value in zip(types, values):
+                    yield Token(kinds[type_], value)
+                if len(types) < _CLEX_CHUNK:
+                    break
+        else:
+            for match in _TOKEN_RE.finditer(text, pos):
+                start, end = match.span()
+                if start != pos:
+                    break
+                kind = match.lastgroup
+                if kind == "NUM":
+                    yield Token(number, int(text[start:end]))
+                elif kind == "ID":
+                    value = text[start:end]
+                    yield Token(keyword if value in KEYWORDS else identifier, value)
+                elif kind == "OP":
+                    yield Token(operator_, text[start:end])
+                pos = end
+        if pos != len(text):
+            raise Exception(f"Unknown symbol: {text[pos]}")
+        self.pos = pos
@@ -0,0 +1,24 @@
+"""
+Optional build step for the compiled lexers:
+
+    python setup.py build_ext --inplace
+
+This builds the `_clexer` C scanner and, when mypy is installed, compiles
+lexer.py with mypyc. The interpreter runs unchanged without either.
+"""
+
+from setuptools import Extension, setup
+
+ext_modules = [Extension("_clexer", ["_clexer.c"])]
+try:
+    from mypyc.build import mypycify
+except ImportError:
+    pass
+else:
+    ext_modules += mypycify(["lexer.py"])
+
+setup(
+    name="shemaython",
+    py_modules=["lexer"],
+    ext_modules=ext_modules,
+)